@@ -5,13 +5,9 @@ An interactive dashboard for exploring budget data across African countries.
 """
 
 import streamlit as st
-import sys
-from pathlib import Path
 
-# Add utils to path
-sys.path.insert(0, str(Path(__file__).parent / 'utils'))
-
-from utils.data_loader import load_budget_data, compute_summary_stats
+from utils.data_loader import get_data, compute_summary_stats
+from utils.debug import render_cache_stats
 
 # Page configuration
 st.set_page_config(
@@ -57,11 +53,6 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Load data
-@st.cache_data
-def get_data():
-    """Load and cache the budget data."""
-    return load_budget_data()
-
 df = get_data()
 
 # Main content
@@ -191,3 +182,6 @@ st.markdown("""
     <p style="font-size: 0.9rem;">Data sourced from government budget documents | Last updated: 2025-10-31</p>
 </div>
 """, unsafe_allow_html=True)
+
+# Maintainer diagnostics (?debug=1)
+render_cache_stats()
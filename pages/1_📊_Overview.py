@@ -2,22 +2,20 @@
 
 import streamlit as st
 import pandas as pd
-import sys
-from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).parent.parent / 'utils'))
-
-from utils.data_loader import load_budget_data, filter_dataframe, COUNTRY_INFO, get_value_column
+from utils.data_loader import get_data, get_filtered_data, COUNTRY_INFO, get_value_column
 from utils.filters import create_year_range_filter, create_country_filter, create_category_filter
-from utils.charts import create_time_series_chart, create_bar_chart, create_heatmap
+from utils.charts import create_time_series_chart, create_bar_chart, create_heatmap_from_pivot
+from utils.exports import filtered_csv_bytes
+from utils.debug import render_cache_stats
 
 st.set_page_config(page_title="Overview", page_icon="📊", layout="wide")
 
-# Load data
-@st.cache_data
-def get_data():
-    return load_budget_data()
+# Columns used by the charts and KPIs on this page
+PAGE_COLUMNS = ('Country', 'FiscalYear', 'IndicatorLabel', 'Value', 'ValueUSD',
+                'IsRevenue', 'IsExpenditure', 'IsHealth', 'IsDebt')
 
+# Load data
 df = get_data()
 
 if df.empty:
@@ -47,29 +45,26 @@ with st.sidebar:
     )
 
 # Apply filters
-filtered_df = filter_dataframe(
-    df,
-    countries=selected_countries,
+filter_args = dict(
+    countries=tuple(selected_countries),
     year_range=year_range,
-    categories=selected_categories
+    categories=tuple(selected_categories)
 )
+filtered_df = get_filtered_data(**filter_args, columns=PAGE_COLUMNS)
 
 # Determine which value column to use based on user preference
-if force_usd:
-    value_col, unit_label = 'ValueUSD', 'million USD'
-else:
-    value_col, unit_label = get_value_column(filtered_df, selected_countries)
+value_col, unit_label = get_value_column(selected_countries, force_usd)
 
 # KPI Cards
 st.markdown("### 🎯 Key Metrics")
 latest_year = filtered_df['FiscalYear'].max()
-latest_data = filtered_df[filtered_df['FiscalYear'] == latest_year]
+# Boolean mask for the latest year, combined with the indicator tags below
+is_latest = filtered_df['FiscalYear'].to_numpy() == latest_year
 
 col1, col2, col3, col4 = st.columns(4)
 
 # Total Revenue
-revenue_data = latest_data[latest_data['IndicatorLabel'].str.contains('Total Revenue')]
-total_revenue = revenue_data[value_col].sum()
+total_revenue = filtered_df.loc[is_latest & filtered_df['IsRevenue'].to_numpy(), value_col].sum()
 
 with col1:
     st.metric(
@@ -79,8 +74,7 @@ with col1:
     )
 
 # Total Expenditure
-expenditure_data = latest_data[latest_data['IndicatorLabel'].str.contains('Total Expenditure')]
-total_expenditure = expenditure_data[value_col].sum()
+total_expenditure = filtered_df.loc[is_latest & filtered_df['IsExpenditure'].to_numpy(), value_col].sum()
 
 with col2:
     st.metric(
@@ -90,8 +84,7 @@ with col2:
     )
 
 # Health Allocation
-health_data = latest_data[latest_data['IndicatorLabel'].str.contains('Health')]
-avg_health = health_data[value_col].mean()
+avg_health = filtered_df.loc[is_latest & filtered_df['IsHealth'].to_numpy(), value_col].mean()
 
 with col3:
     st.metric(
@@ -101,8 +94,7 @@ with col3:
     )
 
 # Debt Service
-debt_data = latest_data[latest_data['IndicatorLabel'].str.contains('Debt Service')]
-avg_debt = debt_data[value_col].mean()
+avg_debt = filtered_df.loc[is_latest & filtered_df['IsDebt'].to_numpy(), value_col].mean()
 
 with col4:
     st.metric(
@@ -125,7 +117,7 @@ with col1:
     
     if not trend_data.empty:
         # Aggregate by year and indicator using appropriate currency
-        agg_trend = trend_data.groupby(['FiscalYear', 'IndicatorLabel'])[value_col].sum().reset_index()
+        agg_trend = trend_data.groupby(['FiscalYear', 'IndicatorLabel'], observed=True)[value_col].sum().reset_index()
         
         fig = create_time_series_chart(
             agg_trend,
@@ -143,7 +135,7 @@ with col2:
     st.markdown("### 🌍 Data Coverage by Country")
     
     # Count data points per country
-    coverage = filtered_df.groupby('Country').size().reset_index(name='DataPoints')
+    coverage = filtered_df.groupby('Country', observed=True).size().reset_index(name='DataPoints')
     coverage = coverage.sort_values('DataPoints', ascending=True)
     
     fig = create_bar_chart(
@@ -164,15 +156,14 @@ col1, col2 = st.columns(2)
 with col1:
     st.markdown("### 🗺️ Data Completeness Heatmap")
     
-    # Create pivot for completeness
-    completeness = filtered_df.groupby(['Country', 'FiscalYear']).size().reset_index(name='Count')
+    # Count indicators per country and year straight into a matrix;
+    # empty combinations stay blank rather than counting as zero
+    completeness = pd.crosstab(filtered_df['Country'], filtered_df['FiscalYear'])
+    completeness = completeness.where(completeness > 0)
     
     if not completeness.empty:
-        fig = create_heatmap(
+        fig = create_heatmap_from_pivot(
             completeness,
-            x_col='FiscalYear',
-            y_col='Country',
-            value_col='Count',
             title='Number of Indicators by Country and Year',
             height=350
         )
@@ -184,8 +175,11 @@ with col2:
     st.markdown("### 📊 Top Indicators (Latest Year)")
     
     # Get top indicators by value using appropriate currency
-    top_indicators = latest_data.groupby('IndicatorLabel')[value_col].sum().reset_index()
-    top_indicators = top_indicators.sort_values(value_col, ascending=False).head(10)
+    top_indicators = (
+        filtered_df[is_latest].groupby('IndicatorLabel', observed=True)[value_col].sum()
+        .nlargest(10)
+        .reset_index()
+    )
     
     if not top_indicators.empty:
         fig = create_bar_chart(
@@ -217,10 +211,13 @@ with col3:
 # Download filtered data
 st.markdown("---")
 st.markdown("### 💾 Export Data")
-csv = filtered_df.to_csv(index=False).encode('utf-8')
+csv = filtered_csv_bytes(**filter_args)
 st.download_button(
     label="📥 Download filtered data as CSV",
     data=csv,
     file_name=f"cabri_budget_data_{latest_year}.csv",
     mime="text/csv"
 )
+
+# Maintainer diagnostics (?debug=1)
+render_cache_stats()
@@ -1,23 +1,50 @@
 """Country Explorer Page - Deep dive into country-specific data."""
 
 import streamlit as st
+import numpy as np
 import pandas as pd
-import sys
-from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).parent.parent / 'utils'))
-
-from utils.data_loader import load_budget_data, filter_dataframe, COUNTRY_INFO
+from utils.data_loader import get_data, get_filtered_data, get_yearly_totals, get_value_column, COUNTRY_INFO, COUNTRY_TO_ISO
 from utils.filters import create_single_country_selector, create_year_range_filter, create_indicator_filter
-from utils.charts import create_time_series_chart, create_pie_chart
+from utils.charts import create_time_series_chart, create_pie_chart, create_grouped_bar_chart
+from utils.exports import filtered_csv_bytes
+from utils.debug import render_cache_stats
 
 st.set_page_config(page_title="Country Explorer", page_icon="🌍", layout="wide")
 
-# Load data
 @st.cache_data
-def get_data():
-    return load_budget_data()
+def compute_growth_pivot(country: str, year_range: tuple, indicators: tuple, value_col: str) -> pd.DataFrame:
+    """Year-over-year growth (%) per indicator, pivoted to indicators x fiscal years."""
+    data = get_filtered_data(countries=(country,), year_range=year_range, indicators=indicators,
+                             columns=('IndicatorLabel', 'FiscalYear', value_col))
+    data = data.sort_values(['IndicatorLabel', 'FiscalYear'])
+    
+    by_indicator = data.groupby('IndicatorLabel', observed=True)[value_col]
+    growth = by_indicator.pct_change(fill_method=None) * 100
+    # Growth is only meaningful against a positive previous value
+    data['Growth'] = growth.where(by_indicator.shift() > 0).round(2)
+    
+    pivot = data.pivot(index='IndicatorLabel', columns='FiscalYear', values='Growth')
+    return pivot.dropna(how='all').dropna(axis=1, how='all').rename_axis(index='Indicator', columns='Year')
+
+
+@st.cache_data
+def average_yearly_total(country: str, group: str, year_range: tuple, indicators: tuple, value_col: str) -> float:
+    """Average over the selected years of an indicator group's yearly total, from the precomputed totals."""
+    yearly_totals = get_yearly_totals()
+    key = (country, group)
+    if key not in yearly_totals.index:
+        return float('nan')
+    totals = yearly_totals.loc[[key]]
+    selected = totals['FiscalYear'].between(*year_range) & totals['IndicatorLabel'].isin(indicators)
+    return totals.loc[selected].groupby('FiscalYear')[value_col].sum().mean()
+
+
+# Columns used by the charts and KPIs on this page
+PAGE_COLUMNS = ('IndicatorLabel', 'Category', 'FiscalYear', 'Value', 'ValueUSD', 'Kind',
+                'Base', 'BaseLabel')
 
+# Load data
 df = get_data()
 
 if df.empty:
@@ -47,35 +74,27 @@ with st.sidebar:
     )
 
 # Filter data for selected country
-country_data = filter_dataframe(
-    df,
-    countries=[selected_country],
+filter_args = dict(
+    countries=(selected_country,),
     year_range=year_range,
-    indicators=selected_indicators
+    indicators=tuple(selected_indicators)
 )
+country_data = get_filtered_data(**filter_args, columns=PAGE_COLUMNS)
 
-# Determine which value column to use based on user preference
-if force_usd:
-    value_col, unit_label = 'ValueUSD', 'million USD'
-else:
-    # Use local currency - get the actual currency unit from the data
-    if not country_data.empty and 'Unit' in country_data.columns:
-        # Get the most common unit for this country
-        unit_label = country_data['Unit'].mode().iloc[0] if len(country_data['Unit'].mode()) > 0 else 'local currency'
-    else:
-        unit_label = 'local currency'
-    value_col = 'Value'
+# Determine which value column to use based on user preference; local
+# currency uses the country's precomputed primary unit
+value_col, unit_label = get_value_column([selected_country], force_usd=force_usd)
 
 # Get country info
-country_iso = country_data['CountryISO'].iloc[0] if not country_data.empty else None
+country_iso = COUNTRY_TO_ISO.get(selected_country)
 country_info = COUNTRY_INFO.get(country_iso, {})
 
 # Country profile card
 st.markdown(f"### {country_info.get('flag', '')} {selected_country}")
 
 # Calculate averages across all years using selected currency
-avg_revenue = country_data[country_data['IndicatorLabel'].str.contains('Total Revenue')].groupby('FiscalYear')[value_col].sum().mean()
-avg_expenditure = country_data[country_data['IndicatorLabel'].str.contains('Total Expenditure')].groupby('FiscalYear')[value_col].sum().mean()
+avg_revenue = average_yearly_total(selected_country, 'Total Revenue', year_range, tuple(selected_indicators), value_col)
+avg_expenditure = average_yearly_total(selected_country, 'Total Expenditure', year_range, tuple(selected_indicators), value_col)
 
 col1, col2, col3, col4 = st.columns(4)
 
@@ -91,8 +110,8 @@ with col3:
 
 with col4:
     years_available = country_data['FiscalYear'].nunique()
-    year_range = f"{country_data['FiscalYear'].min()}-{country_data['FiscalYear'].max()}"
-    st.metric("📅 Years of Data", year_range)
+    years_label = f"{country_data['FiscalYear'].min()}-{country_data['FiscalYear'].max()}"
+    st.metric("📅 Years of Data", years_label)
 
 st.markdown("---")
 
@@ -120,40 +139,26 @@ col1, col2 = st.columns(2)
 with col1:
     st.markdown("### 💰 Budgeted vs Actual (Average Across All Years)")
     
-    # Get budgeted and actual pairs
-    budgeted_actual_pairs = []
-    for indicator in country_data['Indicator'].unique():
-        base_name = indicator.replace('_actual', '').replace('_budgeted', '')
-        budgeted_actual_pairs.append(base_name)
-    
-    # For each unique base indicator, calculate average budgeted and actual
-    comparison_data = []
-    for base in set(budgeted_actual_pairs):
-        budgeted_df = country_data[country_data['Indicator'] == f'{base}_budgeted']
-        actual_df = country_data[country_data['Indicator'] == f'{base}_actual']
-        
-        avg_budgeted = budgeted_df.groupby('FiscalYear')[value_col].sum().mean() if not budgeted_df.empty else 0
-        avg_actual = actual_df.groupby('FiscalYear')[value_col].sum().mean() if not actual_df.empty else 0
-        
-        if avg_budgeted > 0 or avg_actual > 0:
-            label = budgeted_df['IndicatorLabel'].iloc[0] if not budgeted_df.empty else (actual_df['IndicatorLabel'].iloc[0] if not actual_df.empty else base)
-            label = label.replace(' (Actual)', '').replace(' (Budgeted)', '')
-            comparison_data.append({
-                'Indicator': label,
-                'Budgeted': avg_budgeted,
-                'Actual': avg_actual
-            })
+    # Average yearly totals per base indicator, split into budgeted and actual
+    yearly = country_data.groupby(['Base', 'BaseLabel', 'Kind', 'FiscalYear'], observed=True)[value_col].sum()
+    comp_df = (
+        yearly.groupby(level=['Base', 'BaseLabel', 'Kind'], observed=True).mean()
+        .unstack('Kind')
+        .reindex(columns=['Budgeted', 'Actual'])
+        .fillna(0)
+    )
+    comp_df = comp_df[(comp_df['Budgeted'] > 0) | (comp_df['Actual'] > 0)]
+    comp_df = comp_df.reset_index().rename(columns={'BaseLabel': 'Indicator'})
     
-    if comparison_data:
-        comp_df = pd.DataFrame(comparison_data)
-        
-        import plotly.graph_objects as go
-        fig = go.Figure()
-        fig.add_trace(go.Bar(name='Budgeted', x=comp_df['Indicator'], y=comp_df['Budgeted'], marker_color='#4472C4'))
-        fig.add_trace(go.Bar(name='Actual', x=comp_df['Indicator'], y=comp_df['Actual'], marker_color='#ED7D31'))
-        fig.update_layout(
+    if not comp_df.empty:
+        fig = create_grouped_bar_chart(
+            comp_df,
+            categories=comp_df['Indicator'].tolist(),
+            values_dict={
+                'Budgeted': comp_df['Budgeted'].tolist(),
+                'Actual': comp_df['Actual'].tolist()
+            },
             title=f'Average Budgeted vs Actual ({country_data["FiscalYear"].min()}-{country_data["FiscalYear"].max()}) in {unit_label}',
-            barmode='group',
             height=400,
             xaxis_tickangle=-45
         )
@@ -165,8 +170,8 @@ with col2:
     st.markdown("### 🥧 Sectoral Allocation (Average Across All Years)")
     
     # Get sectoral allocations - separate budgeted from actual, and calculate averages
-    sector_actual_data = country_data[(country_data['Category'] == 'Sectoral') & (country_data['IndicatorLabel'].str.contains('Actual'))]
-    sector_budgeted_data = country_data[(country_data['Category'] == 'Sectoral') & (country_data['IndicatorLabel'].str.contains('Budgeted'))]
+    sector_actual_data = country_data[(country_data['Category'] == 'Sectoral') & (country_data['Kind'] == 'Actual')]
+    sector_budgeted_data = country_data[(country_data['Category'] == 'Sectoral') & (country_data['Kind'] == 'Budgeted')]
     
     # Use tabs to show both
     tab1, tab2 = st.tabs(["Actual", "Budgeted"])
@@ -174,12 +179,11 @@ with col2:
     with tab1:
         if not sector_actual_data.empty:
             # Calculate average for each sector across all years
-            sector_actual_avg = sector_actual_data.groupby('IndicatorLabel')[value_col].mean().reset_index()
-            # Clean labels - remove (Actual) suffix
-            labels = [label.replace(' (Actual)', '') for label in sector_actual_avg['IndicatorLabel'].tolist()]
+            # BaseLabel is the indicator label without its (Actual) suffix
+            sector_actual_avg = sector_actual_data.groupby('BaseLabel')[value_col].mean().reset_index()
             fig = create_pie_chart(
                 values=sector_actual_avg[value_col].tolist(),
-                labels=labels,
+                labels=sector_actual_avg['BaseLabel'].tolist(),
                 title=f'Average Sectoral Allocation (Actual) ({country_data["FiscalYear"].min()}-{country_data["FiscalYear"].max()})',
                 height=350
             )
@@ -190,12 +194,11 @@ with col2:
     with tab2:
         if not sector_budgeted_data.empty:
             # Calculate average for each sector across all years
-            sector_budgeted_avg = sector_budgeted_data.groupby('IndicatorLabel')[value_col].mean().reset_index()
-            # Clean labels - remove (Budgeted) suffix
-            labels = [label.replace(' (Budgeted)', '') for label in sector_budgeted_avg['IndicatorLabel'].tolist()]
+            # BaseLabel is the indicator label without its (Budgeted) suffix
+            sector_budgeted_avg = sector_budgeted_data.groupby('BaseLabel')[value_col].mean().reset_index()
             fig = create_pie_chart(
                 values=sector_budgeted_avg[value_col].tolist(),
-                labels=labels,
+                labels=sector_budgeted_avg['BaseLabel'].tolist(),
                 title=f'Average Sectoral Allocation (Budgeted) ({country_data["FiscalYear"].min()}-{country_data["FiscalYear"].max()})',
                 height=350
             )
@@ -209,37 +212,22 @@ st.markdown("---")
 st.markdown("### 📊 Year-over-Year Growth Rates")
 
 # Calculate growth rates using selected currency
-growth_data = []
-for indicator in country_data['IndicatorLabel'].unique():
-    indicator_df = country_data[country_data['IndicatorLabel'] == indicator].sort_values('FiscalYear')
-    for i in range(1, len(indicator_df)):
-        prev_val = indicator_df.iloc[i-1][value_col]
-        curr_val = indicator_df.iloc[i][value_col]
-        if prev_val > 0:
-            growth = ((curr_val - prev_val) / prev_val * 100)
-            growth_data.append({
-                'Indicator': indicator,
-                'Year': indicator_df.iloc[i]['FiscalYear'],
-                'Growth %': round(growth, 2)
-            })
-
-if growth_data:
-    growth_df = pd.DataFrame(growth_data)
-    pivot_growth = growth_df.pivot(index='Indicator', columns='Year', values='Growth %')
-    
-    # Style the dataframe
-    def color_negative_red(val):
-        color = 'red' if val < 0 else 'green' if val > 0 else 'black'
-        return f'color: {color}'
+pivot_growth = compute_growth_pivot(selected_country, year_range, tuple(selected_indicators), value_col)
+
+if not pivot_growth.empty:
+    # Style the dataframe, one vectorized pass per column
+    def color_negative_red(col):
+        values = col.to_numpy()
+        return np.where(values < 0, 'color: red', np.where(values > 0, 'color: green', 'color: black'))
     
-    styled_df = pivot_growth.style.applymap(color_negative_red).format("{:.1f}%", na_rep="N/A")
+    styled_df = pivot_growth.style.apply(color_negative_red, axis=0).format("{:.1f}%", na_rep="N/A")
     st.dataframe(styled_df, use_container_width=True)
 else:
     st.info("Not enough data to calculate growth rates")
 
 # Export country data
 st.markdown("---")
-csv = country_data.to_csv(index=False).encode('utf-8')
+csv = filtered_csv_bytes(**filter_args)
 year_range_str = f"{country_data['FiscalYear'].min()}_{country_data['FiscalYear'].max()}"
 st.download_button(
     label=f"📥 Download {selected_country} data as CSV",
@@ -247,3 +235,6 @@ st.download_button(
     file_name=f"cabri_{country_iso}_{year_range_str}.csv",
     mime="text/csv"
 )
+
+# Maintainer diagnostics (?debug=1)
+render_cache_stats()
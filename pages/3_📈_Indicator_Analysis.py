@@ -1,23 +1,80 @@
 """Indicator Analysis Page - Cross-country comparisons."""
 
 import streamlit as st
+import numpy as np
 import pandas as pd
-import sys
-from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).parent.parent / 'utils'))
-
-from utils.data_loader import load_budget_data, filter_dataframe, INDICATOR_INFO, get_value_column
+from utils.data_loader import get_data, get_filtered_data, INDICATOR_INFO, get_value_column
 from utils.filters import create_single_indicator_selector, create_year_range_filter, create_country_filter
 from utils.charts import create_time_series_chart, create_bar_chart, create_scatter_plot
+from utils.kernels import cagr_per_group
+from utils.exports import filtered_csv_bytes
+from utils.debug import render_cache_stats
 
 st.set_page_config(page_title="Indicator Analysis", page_icon="📈", layout="wide")
 
-# Load data
 @st.cache_data
-def get_data():
-    return load_budget_data()
+def compute_indicator_views(indicator: str, countries: tuple, year_range: tuple, value_col: str) -> dict:
+    """Summary metrics, latest-year ranking and average annual growth per country for one indicator."""
+    data = get_filtered_data(countries=countries, indicators=(indicator,), year_range=year_range,
+                             columns=('Country', 'FiscalYear', value_col))
+    
+    if data.empty:
+        summary = {'avg_value': np.nan, 'max_country': "N/A", 'min_country': "N/A", 'countries_with_data': 0}
+        growth = pd.DataFrame(columns=['Country', 'Avg Growth %'])
+        return {'summary': summary, 'latest_year': None, 'ranking': data, 'growth': growth}
+    
+    # Highest and lowest countries, ignoring missing values; only positive values count
+    values = data[value_col].to_numpy()
+    country_names = data['Country'].to_numpy()
+    has_values = not np.isnan(values).all()
+    max_pos = np.nanargmax(values) if has_values else None
+    min_pos = np.nanargmin(values) if has_values else None
+    summary = {
+        'avg_value': data[value_col].mean(),
+        'max_country': country_names[max_pos] if has_values and values[max_pos] > 0 else "N/A",
+        'min_country': country_names[min_pos] if has_values and values[min_pos] > 0 else "N/A",
+        'countries_with_data': data['Country'].nunique()
+    }
+    
+    latest_year = data['FiscalYear'].max()
+    ranking = data[data['FiscalYear'] == latest_year].sort_values(value_col, ascending=False)
+    
+    # Average growth from each country's first and last years
+    ordered = data.sort_values(['Country', 'FiscalYear'])
+    codes, cagr = cagr_per_group(
+        ordered['Country'].cat.codes.to_numpy(),
+        ordered['FiscalYear'].to_numpy(),
+        ordered[value_col].to_numpy()
+    )
+    growth = (
+        pd.DataFrame({'Country': ordered['Country'].cat.categories[codes], 'Avg Growth %': (cagr * 100).round(2)})
+        .dropna().sort_values('Avg Growth %', ascending=False)
+    )
+    
+    return {'summary': summary, 'latest_year': latest_year, 'ranking': ranking, 'growth': growth}
+
 
+@st.cache_data
+def compute_budget_pairs(base_label: str, countries: tuple, year_range: tuple, value_col: str) -> pd.DataFrame:
+    """Budgeted and actual values side by side, one row per country-year with both."""
+    pair_data = get_filtered_data(
+        countries=countries,
+        indicators=(f'{base_label} (Budgeted)', f'{base_label} (Actual)'),
+        year_range=year_range,
+        columns=('Country', 'FiscalYear', 'Kind', value_col)
+    )
+    
+    return (
+        pair_data.pivot(index=['Country', 'FiscalYear'], columns='Kind', values=value_col)
+        .reindex(columns=['Budgeted', 'Actual'])
+        .dropna()
+        .rename_axis(columns=None)
+        .reset_index()
+    )
+
+
+# Load data
 df = get_data()
 
 if df.empty:
@@ -35,31 +92,14 @@ with st.sidebar:
     selected_indicator = create_single_indicator_selector(df, key="indicator_analysis_indicator")
     year_range = create_year_range_filter(df, key="indicator_analysis_year")
     selected_countries = create_country_filter(df, key="indicator_analysis_country")
-    
-    # Add currency toggle for cross-country comparisons
-    st.markdown("---")
-    st.markdown("### 💱 Display Currency")
-    force_usd = st.checkbox(
-        "Show values in USD",
-        value=len(selected_countries) > 1,
-        key="force_usd_indicator",
-        help="When checked, displays all values in USD for easier comparison. When unchecked, uses local currency for single country views."
-    )
 
 # Filter data
-indicator_data = filter_dataframe(
-    df,
-    countries=selected_countries,
-    indicators=[selected_indicator],
+indicator_data = get_filtered_data(
+    countries=tuple(selected_countries),
+    indicators=(selected_indicator,),
     year_range=year_range
 )
 
-# Determine which value column to use (USD for cross-country, local for single country)
-if force_usd:
-    value_col, unit_label = 'ValueUSD', 'million USD'
-else:
-    value_col, unit_label = get_value_column(indicator_data, selected_countries)
-
 # Indicator info card
 indicator_key = indicator_data['Indicator'].iloc[0] if not indicator_data.empty else None
 indicator_info = INDICATOR_INFO.get(indicator_key, {})
@@ -67,135 +107,143 @@ indicator_info = INDICATOR_INFO.get(indicator_key, {})
 st.markdown(f"### 📊 {selected_indicator}")
 st.markdown(f"*{indicator_info.get('description', 'Budget indicator')}*")
 
-col1, col2, col3, col4 = st.columns(4)
-
-with col1:
-    avg_value = indicator_data[value_col].mean()
-    st.metric("📊 Average Value", f"{avg_value:,.0f} {unit_label}" if pd.notna(avg_value) else "N/A")
-
-with col2:
-    max_country = indicator_data.loc[indicator_data[value_col].idxmax(), 'Country'] if not indicator_data.empty and indicator_data[value_col].max() > 0 else "N/A"
-    st.metric("🏆 Highest", max_country)
-
-with col3:
-    min_country = indicator_data.loc[indicator_data[value_col].idxmin(), 'Country'] if not indicator_data.empty and indicator_data[value_col].min() > 0 else "N/A"
-    st.metric("📉 Lowest", min_country)
 
-with col4:
-    countries_with_data = indicator_data['Country'].nunique()
-    st.metric("🌍 Countries", f"{countries_with_data}/5")
-
-st.markdown("---")
-
-# Cross-country time series
-st.markdown("### 📈 Time Series Comparison")
-
-if not indicator_data.empty:
-    fig = create_time_series_chart(
-        indicator_data,
-        x_col='FiscalYear',
-        y_col=value_col,
-        color_col='Country',
-        title=f'{selected_indicator} - Cross-Country Comparison ({unit_label})',
-        height=500
+@st.fragment
+def render_analysis():
+    """Metrics, charts and export; the currency toggle only reruns this fragment."""
+    # Add currency toggle for cross-country comparisons
+    force_usd = st.checkbox(
+        "💱 Show values in USD",
+        value=len(selected_countries) > 1,
+        key="force_usd_indicator",
+        help="When checked, displays all values in USD for easier comparison. When unchecked, uses local currency for single country views."
     )
-    st.plotly_chart(fig, use_container_width=True)
-else:
-    st.info("No data available for selected filters")
-
-st.markdown("---")
-
-col1, col2 = st.columns(2)
-
-with col1:
-    st.markdown("### 🏅 Latest Year Ranking")
     
-    latest_year = indicator_data['FiscalYear'].max()
-    latest_data = indicator_data[indicator_data['FiscalYear'] == latest_year]
-    latest_data = latest_data.sort_values(value_col, ascending=False)
+    # Determine which value column to use (USD for cross-country, local for single country)
+    value_col, unit_label = get_value_column(selected_countries, force_usd)
     
-    if not latest_data.empty:
-        fig = create_bar_chart(
-            latest_data,
-            x_col=value_col,
-            y_col='Country',
-            title=f'{selected_indicator} - {latest_year} ({unit_label})',
-            orientation='h',
-            height=400
-        )
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("No data for latest year")
-
-with col2:
-    st.markdown("### 📊 Average Annual Growth Rate")
-    
-    # Calculate average growth rate per country
-    growth_rates = []
-    for country in indicator_data['Country'].unique():
-        country_df = indicator_data[indicator_data['Country'] == country].sort_values('FiscalYear')
-        if len(country_df) >= 2:
-            first_val = country_df.iloc[0][value_col]
-            last_val = country_df.iloc[-1][value_col]
-            years = country_df.iloc[-1]['FiscalYear'] - country_df.iloc[0]['FiscalYear']
-            if first_val > 0 and years > 0:
-                avg_growth = ((last_val / first_val) ** (1/years) - 1) * 100
-                growth_rates.append({'Country': country, 'Avg Growth %': round(avg_growth, 2)})
-    
-    if growth_rates:
-        growth_df = pd.DataFrame(growth_rates).sort_values('Avg Growth %', ascending=False)
-        fig = create_bar_chart(
-            growth_df,
-            x_col='Avg Growth %',
-            y_col='Country',
-            title='Average Annual Growth Rate',
-            orientation='h',
-            height=400
+    indicator_views = compute_indicator_views(selected_indicator, tuple(selected_countries), year_range, value_col)
+    summary = indicator_views['summary']
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        avg_value = summary['avg_value']
+        st.metric("📊 Average Value", f"{avg_value:,.0f} {unit_label}" if pd.notna(avg_value) else "N/A")
+    
+    with col2:
+        st.metric("🏆 Highest", summary['max_country'])
+    
+    with col3:
+        st.metric("📉 Lowest", summary['min_country'])
+    
+    with col4:
+        st.metric("🌍 Countries", f"{summary['countries_with_data']}/5")
+    
+    st.markdown("---")
+    
+    # Cross-country time series
+    st.markdown("### 📈 Time Series Comparison")
+    
+    if not indicator_data.empty:
+        fig = create_time_series_chart(
+            indicator_data,
+            x_col='FiscalYear',
+            y_col=value_col,
+            color_col='Country',
+            title=f'{selected_indicator} - Cross-Country Comparison ({unit_label})',
+            height=500
         )
         st.plotly_chart(fig, use_container_width=True)
     else:
-        st.info("Not enough data to calculate growth rates")
-
-st.markdown("---")
-
-# Budgeted vs Actual scatter (if applicable)
-if 'budgeted' in indicator_key or 'actual' in indicator_key:
-    st.markdown("### 🎯 Budgeted vs Actual Alignment")
+        st.info("No data available for selected filters")
     
-    # Get corresponding budgeted/actual data
-    base_indicator = indicator_key.replace('_actual', '').replace('_budgeted', '')
-    budgeted_indicator = f'{base_indicator}_budgeted'
-    actual_indicator = f'{base_indicator}_actual'
+    st.markdown("---")
     
-    # Use the same value column as the rest of the page for consistency
-    budgeted_data = df[df['Indicator'] == budgeted_indicator][['Country', 'FiscalYear', value_col]].rename(columns={value_col: 'Budgeted'})
-    actual_data = df[df['Indicator'] == actual_indicator][['Country', 'FiscalYear', value_col]].rename(columns={value_col: 'Actual'})
+    col1, col2 = st.columns(2)
     
-    scatter_data = pd.merge(budgeted_data, actual_data, on=['Country', 'FiscalYear'], how='inner')
-    scatter_data = scatter_data[(scatter_data['FiscalYear'] >= year_range[0]) & (scatter_data['FiscalYear'] <= year_range[1])]
-    scatter_data = scatter_data[scatter_data['Country'].isin(selected_countries)]
+    with col1:
+        st.markdown("### 🏅 Latest Year Ranking")
+        
+        latest_year = indicator_views['latest_year']
+        latest_data = indicator_views['ranking']
+        
+        if not latest_data.empty:
+            fig = create_bar_chart(
+                latest_data,
+                x_col=value_col,
+                y_col='Country',
+                title=f'{selected_indicator} - {latest_year} ({unit_label})',
+                orientation='h',
+                height=400
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("No data for latest year")
     
-    if not scatter_data.empty and len(scatter_data) > 1:
-        fig = create_scatter_plot(
-            scatter_data,
-            x_col='Budgeted',
-            y_col='Actual',
-            color_col='Country',
-            title=f'Budgeted vs Actual Values - All Years ({unit_label})',
-            height=450
+    with col2:
+        st.markdown("### 📊 Average Annual Growth Rate")
+        
+        growth_df = indicator_views['growth']
+        
+        if not growth_df.empty:
+            fig = create_bar_chart(
+                growth_df,
+                x_col='Avg Growth %',
+                y_col='Country',
+                title='Average Annual Growth Rate',
+                orientation='h',
+                height=400
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("Not enough data to calculate growth rates")
+    
+    st.markdown("---")
+    
+    # Budgeted vs Actual scatter (if applicable)
+    if indicator_key and ('budgeted' in indicator_key or 'actual' in indicator_key):
+        st.markdown("### 🎯 Budgeted vs Actual Alignment")
+        
+        # Use the same value column as the rest of the page for consistency
+        scatter_data = compute_budget_pairs(
+            indicator_data['BaseLabel'].iloc[0],
+            tuple(selected_countries),
+            year_range,
+            value_col
         )
-        st.plotly_chart(fig, use_container_width=True)
         
-        st.info("📌 Points above the diagonal line indicate actual values exceeded budgeted amounts")
-    else:
-        st.info("Not enough budgeted/actual pair data available")
-
-# Export
-st.markdown("---")
-csv = indicator_data.to_csv(index=False).encode('utf-8')
-st.download_button(
-    label=f"📥 Download {selected_indicator} data as CSV",
-    data=csv,
-    file_name=f"cabri_{indicator_key}_comparison.csv",
-    mime="text/csv"
-)
+        if not scatter_data.empty and len(scatter_data) > 1:
+            fig = create_scatter_plot(
+                scatter_data,
+                x_col='Budgeted',
+                y_col='Actual',
+                color_col='Country',
+                title=f'Budgeted vs Actual Values - All Years ({unit_label})',
+                height=450
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            
+            st.info("📌 Points above the diagonal line indicate actual values exceeded budgeted amounts")
+        else:
+            st.info("Not enough budgeted/actual pair data available")
+    
+    # Export
+    st.markdown("---")
+    csv = filtered_csv_bytes(
+        countries=tuple(selected_countries),
+        indicators=(selected_indicator,),
+        year_range=year_range
+    )
+    st.download_button(
+        label=f"📥 Download {selected_indicator} data as CSV",
+        data=csv,
+        file_name=f"cabri_{indicator_key}_comparison.csv",
+        mime="text/csv"
+    )
+    
+
+render_analysis()
+
+# Maintainer diagnostics (?debug=1)
+render_cache_stats()
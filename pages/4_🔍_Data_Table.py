@@ -1,22 +1,38 @@
 """Data Table Page - Browse and export raw data."""
 
 import streamlit as st
+import numpy as np
 import pandas as pd
-import sys
-from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).parent.parent / 'utils'))
-
-from utils.data_loader import load_budget_data, filter_dataframe
+from utils.data_loader import get_data, get_filtered_data, EXPORT_COLUMNS
 from utils.filters import create_country_filter, create_indicator_filter, create_year_range_filter
+from utils.exports import to_csv_bytes, to_excel_bytes
+from utils.debug import render_cache_stats
 
 st.set_page_config(page_title="Data Table", page_icon="🔍", layout="wide")
 
-# Load data
-@st.cache_data
-def get_data():
-    return load_budget_data()
+# Text columns the search box looks in (plus FiscalYear for numeric terms)
+SEARCH_COLUMNS = ('Country', 'CountryISO', 'IndicatorLabel', 'Indicator', 'Category',
+                  'Unit', 'DataType', 'Source')
 
+
+@st.cache_data(show_spinner=False)
+def search_filtered_data(search_term: str, countries: tuple, indicators: tuple, year_range: tuple) -> pd.DataFrame:
+    """Filter the data, then keep rows where any search column contains the term."""
+    data = get_filtered_data(countries=countries, indicators=indicators, year_range=year_range)
+    if not search_term:
+        return data
+    
+    mask = np.logical_or.reduce([
+        data[col].str.contains(search_term, case=False, regex=False, na=False).to_numpy()
+        for col in SEARCH_COLUMNS
+    ])
+    if search_term.isdigit():
+        mask |= data['FiscalYear'].astype(str).str.contains(search_term, regex=False).to_numpy()
+    return data[mask]
+
+
+# Load data
 df = get_data()
 
 if df.empty:
@@ -45,20 +61,16 @@ with st.sidebar:
         help="When checked, adds ValueUSD column to the table for cross-country comparison."
     )
 
-# Apply filters
-filtered_df = filter_dataframe(
-    df,
-    countries=selected_countries if selected_countries else None,
-    indicators=selected_indicators if selected_indicators else None,
-    year_range=year_range
-)
-
 # Search box
 search_term = st.text_input("🔎 Search all columns", placeholder="Type to search...")
 
-if search_term:
-    mask = filtered_df.astype(str).apply(lambda x: x.str.contains(search_term, case=False, na=False)).any(axis=1)
-    filtered_df = filtered_df[mask]
+# Apply filters and search
+filtered_df = search_filtered_data(
+    search_term,
+    countries=tuple(selected_countries) if selected_countries else None,
+    indicators=tuple(selected_indicators) if selected_indicators else None,
+    year_range=year_range
+)
 
 # Summary stats
 col1, col2, col3, col4 = st.columns(4)
@@ -94,23 +106,23 @@ if show_usd:
 if show_sources:
     display_cols.extend(['Source', 'Page'])
 
-# Prepare display dataframe
-display_df = filtered_df[display_cols].copy()
-display_df = display_df.rename(columns={
-    'CountryFlag': '🏳️',
-    'IndicatorLabel': 'Indicator',
-    'FiscalYear': 'Year'
-})
-
 # Pagination
-total_rows = len(display_df)
+total_rows = len(filtered_df)
 total_pages = (total_rows // rows_per_page) + (1 if total_rows % rows_per_page > 0 else 0)
 
+page_df = filtered_df
 if total_pages > 1:
     page = st.slider("Page", min_value=1, max_value=total_pages, value=1)
     start_idx = (page - 1) * rows_per_page
     end_idx = start_idx + rows_per_page
-    display_df = display_df.iloc[start_idx:end_idx]
+    page_df = filtered_df.iloc[start_idx:end_idx]
+
+# Prepare display dataframe from the visible page only
+display_df = page_df[display_cols].rename(columns={
+    'CountryFlag': '🏳️',
+    'IndicatorLabel': 'Indicator',
+    'FiscalYear': 'Year'
+})
 
 # Display table
 st.dataframe(
@@ -128,27 +140,24 @@ st.markdown("### 💾 Export Options")
 
 col1, col2 = st.columns(2)
 
+# Export the source columns only, not the derived tag columns
+export_df = filtered_df[list(EXPORT_COLUMNS)]
+
 with col1:
     # CSV export
-    csv = filtered_df.to_csv(index=False).encode('utf-8')
     st.download_button(
         label="📥 Download as CSV",
-        data=csv,
+        data=to_csv_bytes(export_df),
         file_name="cabri_budget_data.csv",
         mime="text/csv",
         use_container_width=True
     )
 
 with col2:
-    # Excel export
-    import io
-    buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        filtered_df.to_excel(writer, index=False, sheet_name='Budget Data')
-    
+    # Excel export; the workbook is only built when the button is clicked
     st.download_button(
         label="📥 Download as Excel",
-        data=buffer.getvalue(),
+        data=lambda: to_excel_bytes(export_df),
         file_name="cabri_budget_data.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         use_container_width=True
@@ -167,3 +176,6 @@ with st.expander("ℹ️ Column Descriptions"):
     - **Source**: Source document filename
     - **Page**: Page number in source document
     """)
+
+# Maintainer diagnostics (?debug=1)
+render_cache_stats()
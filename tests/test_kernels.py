@@ -0,0 +1,24 @@
+"""Tests for the NumPy group kernels."""
+
+import numpy as np
+
+from utils.kernels import cagr_per_group, group_bounds
+
+
+def test_group_bounds_empty():
+    starts, ends = group_bounds(np.array([], dtype=np.int8))
+    assert starts.size == 0 and ends.size == 0
+
+
+def test_cagr_per_group_empty():
+    codes, cagr = cagr_per_group(np.array([], dtype=np.int8), np.array([], dtype=np.int16), np.array([], dtype=float))
+    assert codes.size == 0 and cagr.size == 0
+
+
+def test_cagr_per_group():
+    codes = np.array([0, 0, 1, 1, 2], dtype=np.int8)
+    years = np.array([2020, 2022, 2020, 2021, 2020])
+    values = np.array([100.0, 121.0, -5.0, 10.0, 7.0])
+    groups, cagr = cagr_per_group(codes, years, values)
+    np.testing.assert_array_equal(groups, [0, 1, 2])
+    np.testing.assert_allclose(cagr, [0.1, np.nan, np.nan])
@@ -1 +1,3 @@
 """Utilities for CABRI Budget Explorer."""
+
+from .data_loader import get_data, get_filtered_data
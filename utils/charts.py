@@ -1,12 +1,47 @@
-"""Reusable chart creation functions using Plotly."""
+"""Reusable chart creation functions using Plotly.
 
+Figures are cached with ``st.cache_resource``: reruns with unchanged inputs
+get the already-built figure object back without reconstructing it or
+round-tripping it through pickle. Returned figures are shared, so callers
+must not modify them.
+"""
+
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import pandas as pd
+import streamlit as st
 from typing import List, Optional
 
 
+def _hash_dataframe(df: pd.DataFrame) -> tuple:
+    """Hash a DataFrame by its columns and contents using pandas' vectorized hasher."""
+    return tuple(df.columns), pd.util.hash_pandas_object(df, index=True).values.tobytes()
+
+
+# Shared line chart layout (unified hover, legend above the plot), registered
+# once and layered over the active default template instead of rebuilt per call
+pio.templates['cabri_lines'] = go.layout.Template(layout=dict(
+    hovermode='x unified',
+    legend=dict(
+        orientation="h",
+        yanchor="bottom",
+        y=1.02,
+        xanchor="right",
+        x=1
+    )
+))
+LINE_TEMPLATE = f'{pio.templates.default}+cabri_lines'
+
+# Line charts with more points than this are drawn with WebGL instead of SVG
+WEBGL_POINT_THRESHOLD = 1000
+
+cache_figure = st.cache_resource(show_spinner=False, max_entries=256, hash_funcs={pd.DataFrame: _hash_dataframe})
+
+
+@cache_figure
 def create_time_series_chart(df: pd.DataFrame,
                              x_col: str = 'FiscalYear',
                              y_col: str = 'Value',
@@ -34,18 +69,9 @@ def create_time_series_chart(df: pd.DataFrame,
         color=color_col,
         title=title,
         markers=True,
-        height=height
-    )
-    
-    fig.update_layout(
-        hovermode='x unified',
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        )
+        height=height,
+        render_mode='webgl' if len(df) > WEBGL_POINT_THRESHOLD else 'svg',
+        template=LINE_TEMPLATE
     )
     
     fig.update_traces(
@@ -57,6 +83,7 @@ def create_time_series_chart(df: pd.DataFrame,
     return fig
 
 
+@cache_figure
 def create_bar_chart(df: pd.DataFrame,
                      x_col: str,
                      y_col: str,
@@ -97,11 +124,13 @@ def create_bar_chart(df: pd.DataFrame,
     return fig
 
 
+@cache_figure
 def create_grouped_bar_chart(df: pd.DataFrame,
                              categories: List[str],
                              values_dict: dict,
                              title: str = 'Comparison',
-                             height: int = 400) -> go.Figure:
+                             height: int = 400,
+                             xaxis_tickangle: Optional[int] = None) -> go.Figure:
     """
     Create a grouped bar chart for budgeted vs actual comparison.
     
@@ -111,6 +140,7 @@ def create_grouped_bar_chart(df: pd.DataFrame,
         values_dict: Dict with keys as group names and values as lists
         title: Chart title
         height: Chart height in pixels
+        xaxis_tickangle: Optional rotation for x-axis labels
         
     Returns:
         Plotly Figure
@@ -131,12 +161,14 @@ def create_grouped_bar_chart(df: pd.DataFrame,
         title=title,
         barmode='group',
         height=height,
-        hovermode='x unified'
+        hovermode='x unified',
+        xaxis_tickangle=xaxis_tickangle
     )
     
     return fig
 
 
+@cache_figure
 def create_pie_chart(values: List[float],
                     labels: List[str],
                     title: str = 'Distribution',
@@ -168,6 +200,7 @@ def create_pie_chart(values: List[float],
     return fig
 
 
+@cache_figure
 def create_scatter_plot(df: pd.DataFrame,
                        x_col: str,
                        y_col: str,
@@ -200,10 +233,12 @@ def create_scatter_plot(df: pd.DataFrame,
         height=height
     )
     
-    # Add diagonal line for x=y reference
-    if df[x_col].notna().any() and df[y_col].notna().any():
-        max_val = max(df[x_col].max(), df[y_col].max())
-        min_val = min(df[x_col].min(), df[y_col].min())
+    # Add diagonal line for x=y reference, spanning both axes in one pass
+    x_values = df[x_col].to_numpy(dtype=float)
+    y_values = df[y_col].to_numpy(dtype=float)
+    if not (np.isnan(x_values).all() or np.isnan(y_values).all()):
+        xy = np.concatenate([x_values, y_values])
+        min_val, max_val = np.nanmin(xy), np.nanmax(xy)
         
         fig.add_trace(go.Scatter(
             x=[min_val, max_val],
@@ -217,28 +252,22 @@ def create_scatter_plot(df: pd.DataFrame,
     return fig
 
 
-def create_heatmap(df: pd.DataFrame,
-                  x_col: str,
-                  y_col: str,
-                  value_col: str,
-                  title: str = 'Heatmap',
-                  height: int = 400) -> go.Figure:
+@cache_figure
+def create_heatmap_from_pivot(pivot: pd.DataFrame,
+                              title: str = 'Heatmap',
+                              height: int = 400) -> go.Figure:
     """
-    Create a heatmap.
+    Create a heatmap from an already pivoted matrix (e.g. from pd.crosstab).
     
     Args:
-        df: DataFrame with data
-        x_col: Column name for x-axis
-        y_col: Column name for y-axis
-        value_col: Column name for cell values
+        pivot: DataFrame whose index, columns and values are the y-axis,
+               x-axis and cell values
         title: Chart title
         height: Chart height in pixels
         
     Returns:
         Plotly Figure
     """
-    pivot = df.pivot(index=y_col, columns=x_col, values=value_col)
-    
     fig = go.Figure(data=go.Heatmap(
         z=pivot.values,
         x=pivot.columns,
@@ -255,6 +284,7 @@ def create_heatmap(df: pd.DataFrame,
     return fig
 
 
+@cache_figure
 def create_multiple_line_chart(df: pd.DataFrame,
                                x_col: str,
                                indicators: List[str],
@@ -274,10 +304,11 @@ def create_multiple_line_chart(df: pd.DataFrame,
         Plotly Figure
     """
     fig = go.Figure()
+    trace_type = go.Scattergl if len(df) * len(indicators) > WEBGL_POINT_THRESHOLD else go.Scatter
     
     for indicator in indicators:
         if indicator in df.columns:
-            fig.add_trace(go.Scatter(
+            fig.add_trace(trace_type(
                 x=df[x_col],
                 y=df[indicator],
                 mode='lines+markers',
@@ -289,14 +320,7 @@ def create_multiple_line_chart(df: pd.DataFrame,
     fig.update_layout(
         title=title,
         height=height,
-        hovermode='x unified',
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        )
+        template=LINE_TEMPLATE
     )
     
     return fig
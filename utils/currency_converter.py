@@ -6,8 +6,10 @@ For years 2015-2024: actual historical data
 For year 2025: estimated based on current rates (October 2025)
 """
 
+import functools
 import re
 from typing import Dict, Optional, Tuple
+import numpy as np
 import pandas as pd
 
 # Historical exchange rates to USD (local currency per USD, annual averages)
@@ -106,6 +108,31 @@ UNIT_MULTIPLIERS = {
     '': 1.0,  # No unit specified
 }
 
+# Flat (year, currency) -> rate lookup, built once from the per-year tables
+_RATES_BY_YEAR_CURRENCY = {
+    (year, currency): rate
+    for year, rates in EXCHANGE_RATES_BY_YEAR.items()
+    for currency, rate in rates.items()
+}
+
+# Dense rate table for array lookups: one row per year in EXCHANGE_RATES_BY_YEAR
+# plus a final row of default averages, one column per known currency plus a
+# final column for unknown currencies. Missing entries are 1.0, matching
+# convert_to_usd, and index -1 selects the default row/unknown column.
+_RATE_YEARS = pd.Index(sorted(EXCHANGE_RATES_BY_YEAR))
+_RATE_CURRENCIES = pd.Index(sorted(set(EXCHANGE_RATES).union(*EXCHANGE_RATES_BY_YEAR.values())))
+_RATE_TABLE = np.array(
+    [[EXCHANGE_RATES_BY_YEAR[year].get(currency, 1.0) for currency in _RATE_CURRENCIES] + [1.0] for year in _RATE_YEARS]
+    + [[EXCHANGE_RATES.get(currency, 1.0) for currency in _RATE_CURRENCIES] + [1.0]]
+)
+
+# Magnitude multipliers for units already in USD, e.g. 'billion USD'
+_USD_UNIT_MULTIPLIERS = {f'{magnitude} USD'.strip(): multiplier for magnitude, multiplier in UNIT_MULTIPLIERS.items()}
+
+# Precompiled unit pattern: a magnitude word or a three-letter currency code
+_UNIT_PATTERN = re.compile(r'(trillion|billion|million|thousand)|\b([a-z]{3})\b')
+
+@functools.lru_cache(maxsize=256)
 def parse_unit(unit: str) -> Tuple[str, str]:
     """
     Parse a unit string like 'billion ZAR' into magnitude and currency.
@@ -118,17 +145,21 @@ def parse_unit(unit: str) -> Tuple[str, str]:
     """
     unit = unit.strip().lower()
     
-    # Extract currency code (3 letters, typically uppercase in original)
-    currency_match = re.search(r'\b([a-z]{3})\b', unit, re.IGNORECASE)
-    currency = currency_match.group(1).upper() if currency_match else 'USD'
-    
-    # Extract magnitude
-    magnitude = ''
-    for mag in ['trillion', 'billion', 'million', 'thousand']:
-        if mag in unit:
-            magnitude = mag
+    # One scan picks up the first magnitude and the first currency code
+    # (3 letters, typically uppercase in original)
+    magnitude, currency = '', None
+    for match in _UNIT_PATTERN.finditer(unit):
+        found_magnitude, found_currency = match.groups()
+        if found_magnitude and not magnitude:
+            magnitude = found_magnitude
+        elif found_currency and currency is None:
+            currency = found_currency.upper()
+        if magnitude and currency:
             break
     
+    if currency is None:
+        currency = 'USD'
+    
     return magnitude, currency
 
 def convert_to_usd(
@@ -152,19 +183,22 @@ def convert_to_usd(
     if pd.isna(value) or value is None:
         return None, None
     
-    # Determine which rates to use
-    if custom_rates:
-        rates = custom_rates
-    elif year and year in EXCHANGE_RATES_BY_YEAR:
-        rates = EXCHANGE_RATES_BY_YEAR[year]
-    else:
-        rates = EXCHANGE_RATES  # Use default averages
+    # USD units need no parsing or rate lookup (USD is 1.0 in every table)
+    if not custom_rates and unit in _USD_UNIT_MULTIPLIERS:
+        return value * _USD_UNIT_MULTIPLIERS[unit] / 1e6, 'million USD'
     
     magnitude, currency = parse_unit(unit)
     
     # Get multipliers
     multiplier = UNIT_MULTIPLIERS.get(magnitude, 1.0)
-    exchange_rate = rates.get(currency, 1.0)
+    
+    # Determine which rate to use
+    if custom_rates:
+        exchange_rate = custom_rates.get(currency, 1.0)
+    elif year and year in EXCHANGE_RATES_BY_YEAR:
+        exchange_rate = _RATES_BY_YEAR_CURRENCY.get((year, currency), 1.0)
+    else:
+        exchange_rate = EXCHANGE_RATES.get(currency, 1.0)  # Use default averages
     
     # Convert to base currency units (e.g., ZAR, GHS)
     base_value = value * multiplier
@@ -190,22 +224,30 @@ def add_usd_column(df: pd.DataFrame, value_col: str = 'Value', unit_col: str = '
     Returns:
         DataFrame with added 'ValueUSD' and 'UnitUSD' columns
     """
-    df = df.copy()
+    values = df[value_col].to_numpy(dtype=float)
     
-    # Apply conversion with year-specific rates
-    conversions = df.apply(
-        lambda row: convert_to_usd(
-            row[value_col], 
-            row[unit_col],
-            year=row.get(year_col) if year_col in row.index else None
-        ) if pd.notna(row[value_col]) else (None, None), 
-        axis=1
-    )
+    # Parse each distinct unit once and broadcast to the rows; the extra
+    # trailing entry is picked up by the -1 code of missing units
+    codes, units = pd.factorize(df[unit_col])
+    parsed = [parse_unit(unit) for unit in units]
+    multipliers = np.array([UNIT_MULTIPLIERS.get(magnitude, 1.0) for magnitude, _ in parsed] + [1.0])
+    currency_codes = _RATE_CURRENCIES.get_indexer([currency for _, currency in parsed] + ['USD'])
+    multiplier = multipliers[codes]
+    currency_code = currency_codes[codes]
     
-    df['ValueUSD'] = [c[0] for c in conversions]
-    df['UnitUSD'] = [c[1] for c in conversions]
+    # Year-specific rates where available, default averages otherwise
+    if year_col in df.columns:
+        year_code = _RATE_YEARS.get_indexer(df[year_col])
+    else:
+        year_code = np.full(len(df), -1)
+    rate = _RATE_TABLE[year_code, currency_code]
     
-    return df
+    # Convert to base currency units, then to USD, then to millions USD.
+    # assign shares the existing columns instead of cloning the whole frame
+    return df.assign(
+        ValueUSD=values * multiplier / rate / 1e6,
+        UnitUSD=np.where(np.isnan(values), None, 'million USD')
+    )
 
 
 def get_exchange_rate_info() -> pd.DataFrame:
@@ -5,8 +5,12 @@ Handles loading JSON files, converting to DataFrames, and computing derived metr
 """
 
 import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List
+import numpy as np
 import pandas as pd
 import streamlit as st
 from .currency_converter import add_usd_column
@@ -21,6 +25,9 @@ COUNTRY_INFO = {
     'ZAF': {'name': 'South Africa', 'color': '#9B59B6', 'flag': '🇿🇦', 'currency': 'ZAR', 'currency_name': 'South African rand'}
 }
 
+# Reverse lookup from country name to ISO code
+COUNTRY_TO_ISO = {info['name']: iso for iso, info in COUNTRY_INFO.items()}
+
 # Indicator metadata
 INDICATOR_INFO = {
     'total_revenue_actual': {
@@ -96,78 +103,357 @@ INDICATOR_INFO = {
 }
 
 
-@st.cache_data
+# Indicator groups, matched against the start of the indicator label
+INDICATOR_GROUP_PATTERN = r'^(Total Revenue|Total Expenditure|Capital Expenditure|Recurrent Expenditure|Health|Agriculture|Debt Service)'
+
+# Default data locations, resolved relative to the project root
+DATA_DIR = Path(__file__).parent.parent / 'data'
+JSON_DIR = DATA_DIR / 'extracted_clean' / 'by_country_indicator'
+PARQUET_PATH = DATA_DIR / 'budget.parquet'
+
+# Repeated string columns held as categoricals so groupby/isin work on integer codes
+CATEGORICAL_COLUMNS = ('Country', 'CountryISO', 'CountryFlag', 'IndicatorLabel', 'Category', 'Indicator',
+                       'Unit', 'UnitUSD', 'DataType', 'Source', 'CountryColor')
+
+# Categories known from the metadata, so their codes do not depend on which
+# files are present; values missing from the metadata are appended at load
+METADATA_CATEGORIES = {
+    'Country': sorted(COUNTRY_TO_ISO),
+    'CountryISO': sorted(COUNTRY_INFO),
+    'Indicator': sorted(INDICATOR_INFO),
+    'IndicatorLabel': sorted(info['label'] for info in INDICATOR_INFO.values()),
+    'Category': sorted({info['category'] for info in INDICATOR_INFO.values()})
+}
+
+# Columns parsed from each JSON file, in frame order
+RECORD_COLUMNS = ('CountryISO', 'Country', 'CountryFlag', 'CountryColor', 'Indicator', 'IndicatorLabel',
+                  'Category', 'FiscalYear', 'Value', 'Unit', 'DataType', 'Source', 'Page')
+
+# Source columns offered in data downloads (excludes derived tag columns)
+EXPORT_COLUMNS = ('CountryISO', 'Country', 'CountryFlag', 'CountryColor', 'Indicator', 'IndicatorLabel',
+                  'Category', 'FiscalYear', 'Value', 'Unit', 'DataType', 'Source', 'Page', 'ValueUSD', 'UnitUSD')
+
+
 def load_budget_data(data_dir: str = None) -> pd.DataFrame:
     """
-    Load all budget data from JSON files into a single DataFrame.
+    Load all budget data into a single DataFrame.
+    
+    Reads the Parquet cache when its manifest matches the source JSON files.
+    Otherwise the JSON files are parsed and the cache is rewritten, so the
+    next cold start skips JSON parsing.
     
     Args:
-        data_dir: Directory containing JSON files (defaults to cleaned data)
+        data_dir: Directory containing JSON files (defaults to cleaned data,
+                  read from the Parquet file if it has been built)
         
     Returns:
         DataFrame with columns: Country, CountryISO, Indicator, IndicatorLabel,
                                 FiscalYear, Value, Unit, Source, Page, Category
     """
-    if data_dir is None:
-        # Resolve path relative to the project root
-        data_dir = Path(__file__).parent.parent / 'data' / 'extracted_clean' / 'by_country_indicator'
+    df = None
+    if data_dir is None and parquet_is_fresh():
+        try:
+            df = pd.read_parquet(PARQUET_PATH)
+        except Exception:
+            df = None  # Unreadable cache: rebuild it from the JSON files
+    
+    if df is None:
+        # Snapshot the sources before reading so a mid-load edit invalidates the cache
+        manifest = source_manifest(Path(data_dir) if data_dir is not None else JSON_DIR)
+        df = load_json_records(data_dir)
+        
+        if data_dir is None and not df.empty:
+            try:
+                write_parquet_cache(df, manifest)
+            except OSError:
+                pass  # Read-only deployments keep parsing JSON
+    
+    # Sort for better display
+    if not df.empty:
+        df = df.sort_values(['Country', 'Category', 'IndicatorLabel', 'FiscalYear'])
+        
+        # Add USD conversion for cross-country comparisons
+        df = add_usd_column(df, value_col='Value', unit_col='Unit')
+        
+        # Tag indicators once so pages can select them without string scans
+        df = add_indicator_tags(df)
+        
+        df = df.astype({col: categorical_dtype(df[col]) for col in CATEGORICAL_COLUMNS})
+        
+        # Display precision is whole units, so the narrower types lose nothing
+        # visible while halving the bytes every filter and groupby touches
+        df = df.astype({'Value': 'float32', 'ValueUSD': 'float32', 'FiscalYear': 'int16', 'Page': 'Int16'})
+    
+    return df
+
+
+def source_manifest(data_dir: Path = JSON_DIR) -> List[list]:
+    """
+    Describe the source JSON files for cache invalidation.
+    
+    Args:
+        data_dir: Directory containing JSON files
+        
+    Returns:
+        Sorted list of [file name, size in bytes, mtime in nanoseconds]
+    """
+    manifest = []
+    for json_file in data_dir.glob('*.json'):
+        stat = json_file.stat()
+        manifest.append([json_file.name, stat.st_size, stat.st_mtime_ns])
+    return sorted(manifest)
+
+
+def manifest_path(path: Path = PARQUET_PATH) -> Path:
+    """Get the sidecar manifest file stored next to a Parquet cache."""
+    return path.with_suffix('.manifest.json')
+
+
+def parquet_is_fresh(path: Path = PARQUET_PATH, data_dir: Path = JSON_DIR) -> bool:
+    """
+    Check whether the Parquet cache was built from the current source JSON files.
+    
+    Args:
+        path: Parquet cache file
+        data_dir: Directory containing JSON files
+        
+    Returns:
+        True if the cache exists and its manifest matches the source files
+        (so added, removed, renamed or restored files all invalidate it)
+    """
+    if not path.exists():
+        return False
+    
+    try:
+        cached = json.loads(manifest_path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return False
+    return cached == source_manifest(data_dir)
+
+
+def _replace_file(path: Path, write) -> None:
+    """Write a file through a temporary sibling and atomically move it into place."""
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_name)
+        os.replace(tmp_name, path)
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
+
+def write_parquet_cache(df: pd.DataFrame, manifest: List[list], path: Path = PARQUET_PATH) -> None:
+    """
+    Write the Parquet cache and its source manifest.
+    
+    Both files are replaced atomically. The old manifest is removed first, so
+    an interrupted write leaves a cache that is treated as stale, not fresh.
+    
+    Args:
+        df: Raw records from load_json_records
+        manifest: source_manifest() taken before the records were read
+        path: Parquet cache file
+    """
+    manifest_file = manifest_path(path)
+    manifest_file.unlink(missing_ok=True)
+    _replace_file(path, lambda tmp: df.to_parquet(tmp, compression='zstd', index=False))
+    _replace_file(manifest_file, lambda tmp: Path(tmp).write_text(json.dumps(manifest), encoding='utf-8'))
+
+
+def categorical_dtype(values: pd.Series) -> pd.CategoricalDtype:
+    """
+    Build the categorical dtype for a column of repeated strings.
+    
+    Args:
+        values: Column values
+        
+    Returns:
+        CategoricalDtype with the metadata categories (if any) followed by
+        any other values found in the column
+    """
+    known = METADATA_CATEGORIES.get(values.name, [])
+    extra = sorted(set(values.dropna().unique()) - set(known))
+    return pd.CategoricalDtype(known + extra)
+
+
+def add_indicator_tags(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add precomputed indicator tag columns.
+    
+    Adds Kind ('Actual', 'Budgeted' or 'Other'), Base and BaseLabel (the
+    indicator key and label without the Actual/Budgeted suffix),
+    IndicatorGroup (e.g. 'Total Revenue', 'Health') and the boolean masks
+    IsRevenue, IsExpenditure, IsHealth and IsDebt used by the KPI cards.
+    
+    Args:
+        df: DataFrame with Indicator and IndicatorLabel columns
+        
+    Returns:
+        DataFrame with the tag columns added
+    """
+    indicator = df['Indicator']
+    kind = np.where(indicator.str.endswith('_actual'), 'Actual',
+                    np.where(indicator.str.endswith('_budgeted'), 'Budgeted', 'Other'))
+    df['Kind'] = pd.Categorical(kind, categories=['Actual', 'Budgeted', 'Other'])
+    df['Base'] = indicator.str.replace(r'_(actual|budgeted)$', '', regex=True)
+    df['BaseLabel'] = df['IndicatorLabel'].str.replace(r' \((Actual|Budgeted)\)$', '', regex=True)
+    
+    group = df['IndicatorLabel'].str.extract(INDICATOR_GROUP_PATTERN)[0]
+    df['IndicatorGroup'] = group.astype('category')
+    df['IsRevenue'] = (group == 'Total Revenue').to_numpy()
+    df['IsExpenditure'] = (group == 'Total Expenditure').to_numpy()
+    df['IsHealth'] = (group == 'Health').to_numpy()
+    df['IsDebt'] = (group == 'Debt Service').to_numpy()
+    
+    return df
+
+
+@st.cache_resource(show_spinner=False)
+def get_data(columns: tuple = None) -> pd.DataFrame:
+    """
+    Load the budget data once and share it across pages and sessions.
+    
+    Cached as a resource, so every caller gets the same DataFrame object
+    without output hashing or copying; treat it as read-only.
+    
+    Args:
+        columns: Optional tuple of columns to project; projections are
+                 taken from the shared full frame
+        
+    Returns:
+        DataFrame with budget data
+    """
+    if columns is None:
+        return load_budget_data()
+    return get_data()[list(columns)]
+
+
+@st.cache_resource(show_spinner=False)
+def get_filter_options() -> Dict[str, list]:
+    """
+    Get the sorted option lists for the filter widgets, computed once.
+    
+    Returns:
+        Dictionary mapping Country, IndicatorLabel, Category and FiscalYear
+        to their sorted unique values in the shared dataset
+    """
+    df = get_data()
+    return {col: sorted(df[col].unique()) for col in ('Country', 'IndicatorLabel', 'Category', 'FiscalYear')}
+
+
+def _parse_json_file(json_file: Path) -> Dict[str, list]:
+    """
+    Parse one country/indicator JSON file into per-column value lists.
+    
+    Args:
+        json_file: Path of the JSON file
+        
+    Returns:
+        Dict mapping each of RECORD_COLUMNS to that file's values
+    """
+    data = json.loads(json_file.read_bytes())
+    
+    country_iso = data.get('country_iso')
+    indicator = data.get('indicator')
+    
+    rows = [
+        (year_entry.get('fiscal_year'), year_entry.get(indicator))
+        for year_entry in data.get('years', [])
+    ]
+    rows = [(fiscal_year, indicator_data) for fiscal_year, indicator_data in rows if indicator_data]
     
-    data_path = Path(data_dir)
+    # Per-file constants, repeated for every year row
+    country = COUNTRY_INFO.get(country_iso, {})
+    indicator_info = INDICATOR_INFO.get(indicator, {})
+    file_values = {
+        'CountryISO': country_iso,
+        'Country': country.get('name', country_iso),
+        'CountryFlag': country.get('flag', ''),
+        'CountryColor': country.get('color', '#333333'),
+        'Indicator': indicator,
+        'IndicatorLabel': indicator_info.get('label', indicator),
+        'Category': indicator_info.get('category', 'Other')
+    }
+    columns = {name: [value] * len(rows) for name, value in file_values.items()}
+    
+    columns['FiscalYear'] = [fiscal_year for fiscal_year, _ in rows]
+    columns['Value'] = [entry.get('value') for _, entry in rows]
+    columns['Unit'] = [entry.get('unit', '') for _, entry in rows]
+    columns['DataType'] = [entry.get('data_type', '') for _, entry in rows]
+    columns['Source'] = [entry.get('source_document', '') for _, entry in rows]
+    columns['Page'] = [entry.get('source_page') for _, entry in rows]
+    
+    return columns
+
+
+def load_json_records(data_dir: str = None) -> pd.DataFrame:
+    """
+    Parse the per-country/indicator JSON files into a flat DataFrame.
+    
+    Files are read and parsed on a small thread pool so disk reads overlap.
+    
+    Args:
+        data_dir: Directory containing JSON files (defaults to cleaned data)
+        
+    Returns:
+        Unsorted DataFrame of raw records, without USD conversion
+    """
+    data_path = Path(data_dir) if data_dir is not None else JSON_DIR
     
     if not data_path.exists():
         st.error(f"Data directory not found: {data_path}")
         return pd.DataFrame()
     
-    all_data = []
+    columns = {name: [] for name in RECORD_COLUMNS}
     json_files = list(data_path.glob('*.json'))
     
-    for json_file in json_files:
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(json_files)))) as executor:
+        futures = [executor.submit(_parse_json_file, json_file) for json_file in json_files]
+    
+    # Warnings are raised here, on the script thread, in file order
+    for json_file, future in zip(json_files, futures):
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            country_iso = data.get('country_iso')
-            indicator = data.get('indicator')
-            
-            for year_entry in data.get('years', []):
-                fiscal_year = year_entry.get('fiscal_year')
-                indicator_data = year_entry.get(indicator)
-                
-                if indicator_data:
-                    value = indicator_data.get('value')
-                    unit = indicator_data.get('unit', '')
-                    data_type = indicator_data.get('data_type', '')
-                    
-                    all_data.append({
-                        'CountryISO': country_iso,
-                        'Country': COUNTRY_INFO.get(country_iso, {}).get('name', country_iso),
-                        'CountryFlag': COUNTRY_INFO.get(country_iso, {}).get('flag', ''),
-                        'CountryColor': COUNTRY_INFO.get(country_iso, {}).get('color', '#333333'),
-                        'Indicator': indicator,
-                        'IndicatorLabel': INDICATOR_INFO.get(indicator, {}).get('label', indicator),
-                        'Category': INDICATOR_INFO.get(indicator, {}).get('category', 'Other'),
-                        'FiscalYear': fiscal_year,
-                        'Value': value,
-                        'Unit': unit,
-                        'DataType': data_type,
-                        'Source': indicator_data.get('source_document', ''),
-                        'Page': indicator_data.get('source_page', '')
-                    })
+            file_columns = future.result()
         except Exception as e:
             st.warning(f"Error loading {json_file.name}: {e}")
+            continue
+        
+        for name in RECORD_COLUMNS:
+            columns[name].extend(file_columns[name])
     
-    df = pd.DataFrame(all_data)
+    df = pd.DataFrame(columns) if columns['FiscalYear'] else pd.DataFrame()
     
-    # Sort for better display
     if not df.empty:
-        df = df.sort_values(['Country', 'Category', 'IndicatorLabel', 'FiscalYear'])
-        
-        # Add USD conversion for cross-country comparisons
-        df = add_usd_column(df, value_col='Value', unit_col='Unit')
+        # Missing pages come through as blanks; keep the column numeric
+        df['Page'] = pd.to_numeric(df['Page'], errors='coerce').astype('Int64')
     
     return df
 
 
+def build_parquet(data_dir: str = None, path: Path = PARQUET_PATH) -> Path:
+    """
+    Convert the JSON source files into a single zstd-compressed Parquet file
+    and record their manifest alongside it.
+    
+    Parquet dictionary-encodes the repeated string columns and stores
+    FiscalYear/Value natively, so loading skips JSON parsing entirely.
+    
+    Run after updating the extracted data: ``python -m utils.data_loader``
+    
+    Args:
+        data_dir: Directory containing JSON files (defaults to cleaned data)
+        path: Output Parquet file
+        
+    Returns:
+        Path of the written file
+    """
+    manifest = source_manifest(Path(data_dir) if data_dir is not None else JSON_DIR)
+    df = load_json_records(data_dir)
+    write_parquet_cache(df, manifest, path)
+    return path
+
+
 @st.cache_data
 def compute_summary_stats(df: pd.DataFrame) -> Dict:
     """Compute summary statistics for the dashboard."""
@@ -198,8 +484,8 @@ def compute_growth_rates(df: pd.DataFrame) -> pd.DataFrame:
     df_sorted = df.sort_values(['CountryISO', 'Indicator', 'FiscalYear'])
     
     # Group by country and indicator
-    df_sorted['PrevValue'] = df_sorted.groupby(['CountryISO', 'Indicator'])['Value'].shift(1)
-    df_sorted['GrowthRate'] = ((df_sorted['Value'] - df_sorted['PrevValue']) / df_sorted['PrevValue'] * 100).round(2)
+    growth = df_sorted.groupby(['CountryISO', 'Indicator'], observed=True)['Value'].pct_change(fill_method=None)
+    df_sorted['GrowthRate'] = (growth * 100).round(2)
     
     return df_sorted
 
@@ -220,23 +506,85 @@ def filter_dataframe(df: pd.DataFrame,
         categories: List of categories to include
         
     Returns:
-        Filtered DataFrame
+        Filtered DataFrame (the input frame itself when no filter is active)
     """
-    filtered = df.copy()
+    # Combine every filter into one mask so the frame is only sliced once
+    masks = []
     
     if countries:
-        filtered = filtered[filtered['Country'].isin(countries)]
+        masks.append(df['Country'].isin(countries).to_numpy())
     
     if indicators:
-        filtered = filtered[filtered['IndicatorLabel'].isin(indicators)]
+        masks.append(df['IndicatorLabel'].isin(indicators).to_numpy())
     
     if year_range:
         min_year, max_year = year_range
-        filtered = filtered[(filtered['FiscalYear'] >= min_year) & (filtered['FiscalYear'] <= max_year)]
+        years = df['FiscalYear'].to_numpy()
+        masks.append((years >= min_year) & (years <= max_year))
     
     if categories:
-        filtered = filtered[filtered['Category'].isin(categories)]
+        masks.append(df['Category'].isin(categories).to_numpy())
+    
+    if not masks:
+        return df
+    
+    return df[np.logical_and.reduce(masks)]
+
+
+@st.cache_resource(show_spinner=False)
+def get_row_index() -> Dict[tuple, np.ndarray]:
+    """
+    Map each (Country, FiscalYear) pair to its row positions in get_data().
+    
+    Returns:
+        Dictionary of sorted positional row arrays keyed by (country, year)
+    """
+    return get_data().groupby(['Country', 'FiscalYear'], observed=True).indices
+
+
+@st.cache_data(ttl=3600, max_entries=64, show_spinner=False)
+def get_filtered_data(countries: tuple = None,
+                      indicators: tuple = None,
+                      year_range: tuple = None,
+                      categories: tuple = None,
+                      columns: tuple = None) -> pd.DataFrame:
+    """
+    Cached filter_dataframe over the full budget dataset.
+    
+    Filters are passed as tuples so they are hashable; reruns with an
+    unchanged selection return the cached slice without rescanning.
+    Country and year cuts are resolved through get_row_index(), so only
+    the indicator and category masks scan the (already small) slice.
+    The cache keeps the most recent 64 selections.
+    
+    Args:
+        countries: Tuple of country names to include
+        indicators: Tuple of indicator labels to include
+        year_range: Tuple of (min_year, max_year)
+        categories: Tuple of categories to include
+        columns: Optional tuple of columns to keep in the result
+        
+    Returns:
+        Filtered DataFrame
+    """
+    df = get_data()
     
+    if countries or year_range:
+        min_year, max_year = year_range if year_range else (None, None)
+        positions = [
+            rows for (country, year), rows in get_row_index().items()
+            if (not countries or country in countries)
+            and (not year_range or min_year <= year <= max_year)
+        ]
+        df = df.take(np.sort(np.concatenate(positions))) if positions else df.iloc[:0]
+    
+    filtered = filter_dataframe(
+        df,
+        indicators=indicators,
+        categories=categories
+    )
+    if columns is not None:
+        filtered = filtered[list(columns)]
     return filtered
 
 
@@ -260,34 +608,65 @@ def get_currency_name_for_country(country_iso: str) -> str:
     return COUNTRY_INFO.get(country_iso, {}).get('currency_name', 'local currency')
 
 
-def get_value_column(df: pd.DataFrame, selected_countries: List[str] = None) -> tuple[str, str]:
+@st.cache_resource(show_spinner=False)
+def get_primary_units() -> Dict[str, str]:
+    """
+    Get the most common local-currency unit for each country.
+    
+    Computed once from the shared dataset and reused for every
+    single-country view.
+    
+    Returns:
+        Dict mapping country name to unit, e.g. {'Kenya': 'billion KES'}
+    """
+    df = get_data()
+    if df.empty:
+        return {}
+    
+    # Most frequent unit per country; the stable sort keeps ties in category
+    # order, matching Series.mode()
+    counts = df.groupby(['Country', 'Unit'], observed=True).size().sort_values(ascending=False, kind='stable')
+    primary = counts.reset_index().drop_duplicates('Country')
+    return dict(zip(primary['Country'], primary['Unit']))
+
+
+@st.cache_resource(show_spinner=False)
+def get_yearly_totals() -> pd.DataFrame:
     """
-    Determine which value column to use based on number of countries selected.
+    Get yearly totals per country and indicator group, computed once.
+    
+    Returns:
+        DataFrame indexed by (Country, IndicatorGroup) with columns
+        IndicatorLabel, FiscalYear, Value and ValueUSD
+    """
+    df = get_data()
+    totals = df.groupby(['Country', 'IndicatorGroup', 'IndicatorLabel', 'FiscalYear'], observed=True)[['Value', 'ValueUSD']].sum()
+    return totals.reset_index(['IndicatorLabel', 'FiscalYear']).sort_index()
+
+
+def get_value_column(selected_countries: List[str], force_usd: bool = False) -> tuple[str, str]:
+    """
+    Determine which value column to use based on the countries selected.
     
     For cross-country comparisons, we must use USD to make values comparable.
     For single-country analysis, we can use local currency.
     
     Args:
-        df: DataFrame with budget data
         selected_countries: List of selected country names
+        force_usd: If True, always use USD
         
     Returns:
         Tuple of (value_column_name, unit_description)
         e.g., ('ValueUSD', 'million USD') or ('Value', 'billion KES')
     """
-    if selected_countries is None:
-        # Get unique countries from the filtered data
-        num_countries = df['Country'].nunique()
-    else:
-        num_countries = len(selected_countries)
-    
-    # Use USD for cross-country comparisons
-    if num_countries > 1:
+    # Use USD for cross-country comparisons or when requested
+    if force_usd or len(selected_countries) != 1:
         return ('ValueUSD', 'million USD')
-    else:
-        # Use local currency for single country - get the actual currency from the data
-        if not df.empty and 'Unit' in df.columns:
-            # Get the most common unit for this country
-            unit = df['Unit'].mode().iloc[0] if len(df['Unit'].mode()) > 0 else 'local currency'
-            return ('Value', unit)
-        return ('Value', 'local currency')
+    
+    # Use local currency for single country - the country's most common unit
+    return ('Value', get_primary_units().get(selected_countries[0], 'local currency'))
+
+
+if __name__ == "__main__":
+    out = build_parquet()
+    print(f"Wrote {out}")
@@ -0,0 +1,53 @@
+"""Maintainer diagnostics, shown only when the page URL has ?debug=1."""
+
+import pandas as pd
+import streamlit as st
+
+
+def debug_enabled() -> bool:
+    """Check whether the ?debug=1 query parameter is set."""
+    return st.query_params.get('debug') == '1'
+
+
+def get_cache_stats() -> pd.DataFrame:
+    """
+    Collect memory usage for every st.cache_data and st.cache_resource function.
+
+    Uses Streamlit's internal stats providers, imported here so a Streamlit
+    upgrade that moves them only breaks the debug panel.
+
+    Returns:
+        DataFrame with columns: Cache, Function, Bytes (largest first)
+    """
+    from streamlit.runtime.caching import get_data_cache_stats_provider, get_resource_cache_stats_provider
+
+    rows = []
+    for provider in (get_data_cache_stats_provider(), get_resource_cache_stats_provider()):
+        for stats in provider.get_stats().values():
+            for stat in stats:
+                rows.append({
+                    'Cache': stat.category_name,
+                    'Function': stat.cache_name,
+                    'Bytes': stat.byte_length
+                })
+
+    return pd.DataFrame(rows, columns=['Cache', 'Function', 'Bytes']).sort_values('Bytes', ascending=False)
+
+
+def render_cache_stats():
+    """Render cache statistics in a sidebar expander when debugging is enabled."""
+    if not debug_enabled():
+        return
+
+    with st.sidebar.expander("🛠️ Cache statistics"):
+        try:
+            stats = get_cache_stats()
+        except (ImportError, AttributeError):
+            st.info("Cache statistics are not available in this Streamlit version")
+            return
+
+        if stats.empty:
+            st.caption("No cached entries yet")
+        else:
+            st.dataframe(stats, hide_index=True, use_container_width=True)
+            st.caption(f"Total: {stats['Bytes'].sum() / 1e6:,.2f} MB")
@@ -0,0 +1,82 @@
+"""Cached serialization helpers for data downloads."""
+
+import io
+import pandas as pd
+import streamlit as st
+from .data_loader import EXPORT_COLUMNS, get_filtered_data
+
+
+def _write_csv(df: pd.DataFrame) -> bytes:
+    """Write a DataFrame as UTF-8 CSV straight into a bytes buffer."""
+    buffer = io.BytesIO()
+    df.to_csv(buffer, index=False, encoding='utf-8')
+    return buffer.getvalue()
+
+
+@st.cache_data(show_spinner=False)
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """
+    Serialize a DataFrame to UTF-8 encoded CSV for a download button.
+    
+    Cached on the DataFrame contents, so reruns that leave the filters
+    unchanged skip re-serialization.
+    
+    Args:
+        df: DataFrame to export
+        
+    Returns:
+        CSV file contents as bytes
+    """
+    return _write_csv(df)
+
+
+@st.cache_data(show_spinner=False)
+def to_excel_bytes(df: pd.DataFrame, sheet_name: str = 'Budget Data') -> bytes:
+    """
+    Serialize a DataFrame to an Excel workbook for a download button.
+    
+    Cached on the DataFrame contents like to_csv_bytes, so the workbook is
+    only written once per distinct selection rather than on every rerun.
+    
+    Args:
+        df: DataFrame to export
+        sheet_name: Name of the worksheet
+        
+    Returns:
+        Excel (.xlsx) file contents as bytes
+    """
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name=sheet_name)
+    return buffer.getvalue()
+
+
+@st.cache_data(show_spinner=False)
+def filtered_csv_bytes(countries: tuple = None,
+                       indicators: tuple = None,
+                       year_range: tuple = None,
+                       categories: tuple = None) -> bytes:
+    """
+    Serialize a filtered selection of the budget data to CSV.
+    
+    Keyed on the filter selection rather than the DataFrame, so reruns
+    and other sessions with the same filters reuse the bytes without
+    hashing or even loading the filtered frame.
+    
+    Args:
+        countries: Tuple of country names to include
+        indicators: Tuple of indicator labels to include
+        year_range: Tuple of (min_year, max_year)
+        categories: Tuple of categories to include
+        
+    Returns:
+        CSV file contents as bytes, with the source columns only
+    """
+    df = get_filtered_data(
+        countries=countries,
+        indicators=indicators,
+        year_range=year_range,
+        categories=categories,
+        columns=EXPORT_COLUMNS
+    )
+    return _write_csv(df)
@@ -3,6 +3,26 @@
 import streamlit as st
 from typing import List, Tuple
 import pandas as pd
+from .data_loader import get_data, get_filter_options
+
+
+def get_options(df: pd.DataFrame, column: str) -> List[str]:
+    """
+    Get the sorted unique values of a column for a filter widget.
+    
+    Options for the shared dataset are copied from get_filter_options()
+    rather than rescanning the frame on every rerun.
+    
+    Args:
+        df: DataFrame with the column
+        column: Column name
+        
+    Returns:
+        Sorted list of unique values
+    """
+    if df is get_data():
+        return list(get_filter_options()[column])
+    return sorted(df[column].unique())
 
 
 def create_country_filter(df: pd.DataFrame, key: str = "country_filter", default_all: bool = True) -> List[str]:
@@ -17,7 +37,7 @@ def create_country_filter(df: pd.DataFrame, key: str = "country_filter", default
     Returns:
         List of selected country names
     """
-    countries = sorted(df['Country'].unique())
+    countries = get_options(df, 'Country')
     
     default = countries if default_all else []
     
@@ -44,7 +64,7 @@ def create_indicator_filter(df: pd.DataFrame, key: str = "indicator_filter", def
     Returns:
         List of selected indicator labels
     """
-    indicators = sorted(df['IndicatorLabel'].unique())
+    indicators = get_options(df, 'IndicatorLabel')
     
     default = indicators if default_all else []
     
@@ -70,8 +90,8 @@ def create_year_range_filter(df: pd.DataFrame, key: str = "year_filter") -> Tupl
     Returns:
         Tuple of (min_year, max_year)
     """
-    min_year = int(df['FiscalYear'].min())
-    max_year = int(df['FiscalYear'].max())
+    years = get_options(df, 'FiscalYear')
+    min_year, max_year = int(years[0]), int(years[-1])
     
     selected_range = st.slider(
         '📅 Fiscal Year Range',
@@ -96,7 +116,7 @@ def create_category_filter(df: pd.DataFrame, key: str = "category_filter") -> Li
     Returns:
         List of selected categories
     """
-    categories = sorted(df['Category'].unique())
+    categories = get_options(df, 'Category')
     
     selected = st.multiselect(
         '🏷️ Select Categories',
@@ -120,7 +140,7 @@ def create_single_country_selector(df: pd.DataFrame, key: str = "single_country"
     Returns:
         Selected country name
     """
-    countries = sorted(df['Country'].unique())
+    countries = get_options(df, 'Country')
     
     # Set South Africa as default if available, otherwise use first country
     default_index = 0
@@ -149,7 +169,7 @@ def create_single_indicator_selector(df: pd.DataFrame, key: str = "single_indica
     Returns:
         Selected indicator label
     """
-    indicators = sorted(df['IndicatorLabel'].unique())
+    indicators = get_options(df, 'IndicatorLabel')
     
     selected = st.selectbox(
         '📊 Select Indicator',
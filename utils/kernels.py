@@ -0,0 +1,50 @@
+"""NumPy kernels over sorted group arrays, used where pandas groupby dispatch is overhead."""
+
+import numpy as np
+
+
+def group_bounds(codes: np.ndarray) -> tuple:
+    """
+    Find the first and last positions of each run of equal group codes.
+
+    Args:
+        codes: Integer group codes, sorted so each group is contiguous
+
+    Returns:
+        Tuple of (starts, ends) position arrays, one entry per group
+        (both empty when there are no codes)
+    """
+    if codes.size == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    starts = np.flatnonzero(np.diff(codes.astype(np.int64), prepend=-1))
+    ends = np.append(starts[1:], codes.size) - 1
+    return starts, ends
+
+
+def cagr_per_group(codes: np.ndarray, years: np.ndarray, values: np.ndarray) -> tuple:
+    """
+    Compound annual growth rate between each group's first and last rows.
+
+    Rates are only defined when the first value is positive and the last
+    year is after the first; otherwise they are NaN.
+
+    Args:
+        codes: Integer group codes (e.g. Categorical codes), sorted by code then year
+        years: Year of each row
+        values: Value of each row
+
+    Returns:
+        Tuple of (group codes, growth rates as fractions)
+    """
+    if codes.size == 0:
+        return codes[:0], np.empty(0, dtype=float)
+
+    starts, ends = group_bounds(codes)
+    first, last = values[starts], values[ends]
+    span = years[ends] - years[starts]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cagr = (last / first) ** (1 / span) - 1
+
+    return codes[starts], np.where((first > 0) & (span > 0), cagr, np.nan)